@@ -0,0 +1,52 @@
+"""
+Throughput benchmark: local image-metrics engine vs. the previous
+full-resolution, one-image-at-a-time scoring in analyze_image.
+
+Usage: python benchmark_metrics.py [--images 64] [--width 4032] [--height 3024] [--batch 16]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from utils.image_metrics import compute_metrics
+from utils.metrics_calibration import legacy_scores
+
+
+def synthetic_images(count: int, width: int, height: int) -> list:
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        img = cv2.resize(rng.integers(0, 256, (height // 32, width // 32, 3), dtype=np.uint8), (width, height))
+        cv2.rectangle(img, (width // 4, height // 3), (3 * width // 4, 2 * height // 3), (40, 40, 200), -1)
+        images.append(img)
+    return images
+
+
+def images_per_second(fn, images: list, batch: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(images), batch):
+        fn(images[i:i + batch])
+    return len(images) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    images = synthetic_images(args.images, args.width, args.height)
+    legacy = images_per_second(lambda chunk: [legacy_scores(img) for img in chunk], images, args.batch)
+    engine = images_per_second(compute_metrics, images, args.batch)
+
+    print(f"{args.images} images at {args.width}x{args.height}, batch size {args.batch}")
+    print(f"legacy analyze_image scoring: {legacy:8.1f} images/sec")
+    print(f"image-metrics engine:         {engine:8.1f} images/sec ({engine / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Fit the image-metrics calibration constants against the synthetic reference
+scene in utils/metrics_calibration.py, and print them for CALIBRATION in
+utils/image_metrics.py.
+
+Usage: python calibrate_metrics.py
+"""
+from utils.metrics_calibration import fit_calibration
+
+
+def main():
+    for key, value in fit_calibration().items():
+        print(f"{key}: {value:.4g}")
+
+
+if __name__ == "__main__":
+    main()
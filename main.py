@@ -1,5 +1,5 @@
 import logging
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
@@ -8,11 +8,15 @@ import cv2
 import numpy as np
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
+import hashlib
+import sqlite3
 import pprint
 from dotenv import load_dotenv
 from utils.openai_vision import analyze_with_openai_multi, parse_openai_results
+from utils.image_metrics import compute_metrics
+from utils.results_store import ResultsStore
 import re
 # Load environment variables from .env file
 load_dotenv()
@@ -39,42 +43,91 @@ app.add_middleware(
 os.makedirs("data/images", exist_ok=True)
 os.makedirs("data/training", exist_ok=True)
 
+# Persist analysis results so they can be looked up by imageId later
+RESULTS_DB = "data/results.db"
+results_store = ResultsStore(RESULTS_DB)
+
+def save_results(results: dict, endpoint: str) -> None:
+    """Persist an analysis result; a storage failure must not lose the analysis itself"""
+    try:
+        results_store.save(results, endpoint=endpoint)
+    except sqlite3.Error as e:
+        logger.error(f"Failed to store result {results['metadata']['imageId']}: {e}")
+
 class TrainingFeedback(BaseModel):
     ruleId: str
     isCorrect: bool
     imageId: str
 
+# Rule scores are on the calibrated image-metrics scale from this version on
+RULES_SCORE_VERSION = 2
+# Rules whose scores changed meaning with the image-metrics engine; thresholds
+# trained against the old scores are reset to the defaults below
+RESCALED_RULES = {"rule1", "rule2"}
+
+DEFAULT_RULES = [
+    {
+        "id": "rule1",
+        "name": "Image Quality",
+        "description": "Check if the image is clear and well-lit",
+        "threshold": 0.7,
+        "scoreVersion": RULES_SCORE_VERSION
+    },
+    {
+        "id": "rule2",
+        "name": "Vehicle Visibility",
+        "description": "Ensure the entire vehicle is visible in the frame",
+        "threshold": 0.8,
+        "scoreVersion": RULES_SCORE_VERSION
+    },
+    {
+        "id": "rule3",
+        "name": "Background Clarity",
+        "description": "Check if the background is clear and not cluttered",
+        "threshold": 0.6,
+        "scoreVersion": RULES_SCORE_VERSION
+    }
+]
+
+def migrate_rules(rules: List[dict]) -> bool:
+    """Bring rules saved for older score scales up to date. Returns True if anything changed."""
+    defaults = {rule["id"]: rule for rule in DEFAULT_RULES}
+    changed = False
+    for rule in rules:
+        if rule.get("scoreVersion") == RULES_SCORE_VERSION:
+            continue
+        if rule["id"] in RESCALED_RULES:
+            logger.info(f"Resetting {rule['id']} threshold {rule['threshold']} to {defaults[rule['id']]['threshold']} for the recalibrated score")
+            rule["threshold"] = defaults[rule["id"]]["threshold"]
+        rule["scoreVersion"] = RULES_SCORE_VERSION
+        changed = True
+    return changed
+
 # Load or initialize rules
 RULES_FILE = "data/rules.json"
 if os.path.exists(RULES_FILE):
     with open(RULES_FILE, "r") as f:
         RULES = json.load(f)
+    if migrate_rules(RULES):
+        with open(RULES_FILE, "w") as f:
+            json.dump(RULES, f, indent=2)
 else:
-    RULES = [
-        {
-            "id": "rule1",
-            "name": "Image Quality",
-            "description": "Check if the image is clear and well-lit",
-            "threshold": 0.7
-        },
-        {
-            "id": "rule2",
-            "name": "Vehicle Visibility",
-            "description": "Ensure the entire vehicle is visible in the frame",
-            "threshold": 0.8
-        },
-        {
-            "id": "rule3",
-            "name": "Background Clarity",
-            "description": "Check if the background is clear and not cluttered",
-            "threshold": 0.6
-        }
-    ]
+    RULES = [dict(rule) for rule in DEFAULT_RULES]
     with open(RULES_FILE, "w") as f:
         json.dump(RULES, f, indent=2)
 
+def analyze_images(images: List[np.ndarray]) -> List[dict]:
+    """Analyze a batch of images with the local image-metrics engine"""
+    return [
+        _build_results(image, metrics)
+        for image, metrics in zip(images, compute_metrics(images))
+    ]
+
 def analyze_image(image: np.ndarray) -> dict:
     """Analyze the image using various computer vision techniques"""
+    return analyze_images([image])[0]
+
+def _build_results(image: np.ndarray, metrics: dict) -> dict:
     results = {
         "rules": [],
         "overallScore": 0,
@@ -85,16 +138,13 @@ def analyze_image(image: np.ndarray) -> dict:
                 "width": image.shape[1],
                 "height": image.shape[0]
             },
-            "format": "JPEG"
+            "format": "JPEG",
+            "metrics": metrics
         }
     }
 
-    # Convert to grayscale for some analyses
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
     # Rule 1: Image Quality (using blur detection)
-    blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
-    quality_score = min(1.0, blur_score / 500)  # Normalize blur score
+    quality_score = metrics["blur"]["score"]
     results["rules"].append({
         "id": "rule1",
         "name": "Image Quality",
@@ -103,10 +153,8 @@ def analyze_image(image: np.ndarray) -> dict:
         "confidence": round(quality_score * 100, 2)
     })
 
-    # Rule 2: Vehicle Visibility (using edge detection)
-    edges = cv2.Canny(gray, 100, 200)
-    edge_density = np.count_nonzero(edges) / (image.shape[0] * image.shape[1])
-    visibility_score = min(1.0, edge_density * 10)  # Normalize edge density
+    # Rule 2: Vehicle Visibility (using edge density)
+    visibility_score = metrics["edge_density"]["score"]
     results["rules"].append({
         "id": "rule2",
         "name": "Vehicle Visibility",
@@ -116,8 +164,7 @@ def analyze_image(image: np.ndarray) -> dict:
     })
 
     # Rule 3: Background Clarity (using color variance)
-    color_std = np.std(image, axis=(0, 1))
-    background_score = min(1.0, np.mean(color_std) / 100)  # Normalize color variance
+    background_score = metrics["color_variance"]["score"]
     results["rules"].append({
         "id": "rule3",
         "name": "Background Clarity",
@@ -139,6 +186,8 @@ def analyze_image(image: np.ndarray) -> dict:
         results["suggestions"].append("Ensure the entire vehicle is visible in the frame")
     if background_score < RULES[2]["threshold"]:
         results["suggestions"].append("Try to take the photo against a cleaner background")
+    if metrics["lowResolution"]:
+        results["suggestions"].append("Upload a higher-resolution photo for more reliable scores")
 
     return results
 
@@ -164,6 +213,10 @@ async def analyze_photo(image: UploadFile = File(...), training_mode: bool = Fal
         # Analyze image
         results = analyze_image(img)
         results["metadata"]["imageId"] = image_id
+        results["metadata"]["contentHash"] = hashlib.sha256(contents).hexdigest()
+        results["metadata"]["filename"] = image.filename
+        results["metadata"]["timestamp"] = datetime.now(timezone.utc).isoformat()
+        save_results(results, endpoint="analyze")
 
         return results
 
@@ -263,9 +316,12 @@ async def analyze_batch(images: List[UploadFile] = File(...), training_mode: boo
                     "dimensions": {"width": img.shape[1], "height": img.shape[0]},
                     "format": "JPEG",
                     "imageId": image_id,
-                    "filename": image.filename
+                    "filename": image.filename,
+                    "contentHash": hashlib.sha256(contents).hexdigest(),
+                    "timestamp": datetime.now(timezone.utc).isoformat()
                 }
             }
+            save_results(results_dict, endpoint="analyze_batch")
             results.append(results_dict)
 
         except Exception as e:
@@ -286,6 +342,42 @@ async def analyze_batch(images: List[UploadFile] = File(...), training_mode: boo
     pprint.pprint(results)
     return {"results": results}
 
+@app.get("/results/{image_id}")
+async def get_result(image_id: str):
+    """Fetch a stored analysis result by imageId"""
+    try:
+        results = results_store.get(image_id)
+    except sqlite3.Error as e:
+        logger.error(f"Failed to read result {image_id}: {e}")
+        raise HTTPException(status_code=503, detail="Results store unavailable")
+    if results is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return results
+
+@app.get("/results")
+async def query_results(
+    contentHash: Optional[str] = None,
+    filename: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """Paginated lookup of stored results, newest first. Timestamps without an offset are taken as UTC."""
+    try:
+        results, total = results_store.query(
+            content_hash=contentHash,
+            filename=filename,
+            since=since,
+            until=until,
+            limit=limit,
+            offset=offset
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Failed to query results: {e}")
+        raise HTTPException(status_code=503, detail="Results store unavailable")
+    return {"results": results, "total": total, "limit": limit, "offset": offset}
+
 @app.get("/")
 async def health_check():
     """Health check endpoint for deployment platforms"""
@@ -310,7 +402,8 @@ async def detailed_health_check():
         "rules_loaded": len(RULES),
         "data_directories": {
             "images": os.path.exists("data/images"),
-            "training": os.path.exists("data/training")
+            "training": os.path.exists("data/training"),
+            "results": os.path.exists(RESULTS_DB)
         }
     }
 
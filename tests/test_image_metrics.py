@@ -0,0 +1,138 @@
+import math
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.image_metrics import CALIBRATION, compute_metrics, to_pyramid_level
+from utils.metrics_calibration import blurred_reference_scene, fit_calibration, reference_scene
+
+
+def blurred_scene(size, pyramid_sigma=1.0):
+    """Reference scene blurred by pyramid_sigma pixels at the pyramid level, resized to size"""
+    return cv2.resize(blurred_reference_scene(pyramid_sigma), size, interpolation=cv2.INTER_AREA)
+
+
+def portrait(image):
+    return np.ascontiguousarray(np.rot90(image))
+
+
+def line_pattern(angle, size=(1600, 1200)):
+    """Parallel light lines on a dark frame, rotated clockwise (as displayed) by angle degrees"""
+    width, height = size
+    img = np.full((height, width, 3), 40, dtype=np.uint8)
+    slope = math.tan(math.radians(angle))
+    for y0 in range(-height, 2 * height, height // 8):
+        x1, x2 = -width, 2 * width
+        p1 = (x1, int(y0 + (x1 - width / 2) * slope))
+        p2 = (x2, int(y0 + (x2 - width / 2) * slope))
+        cv2.line(img, p1, p2, (220, 220, 220), 12, cv2.LINE_AA)
+    return img
+
+
+def test_pyramid_level_scales_short_side_uniformly():
+    for size, expected in [
+        ((4032, 3024), (240, 320)),
+        ((1920, 1080), (240, 427)),
+        ((1080, 1920), (427, 240)),
+        ((100, 75), (240, 320)),
+        ((4000, 100), (24, 960)),
+    ]:
+        img = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        assert to_pyramid_level(img).shape[:2] == expected
+
+
+def test_blur_score_stable_across_resolutions():
+    sizes = [(4032, 3024), (1600, 1200), (800, 600), (320, 240), (200, 150)]
+    scores = [r["blur"]["score"] for r in compute_metrics([blurred_scene(s) for s in sizes], ["blur"])]
+    assert max(scores) - min(scores) < 0.15
+    assert scores[1] == pytest.approx(0.7, abs=0.02)
+
+
+@pytest.mark.parametrize("pyramid_sigma", [0, 1])
+def test_scores_independent_of_aspect_ratio_and_orientation(pyramid_sigma):
+    wide = blurred_reference_scene(pyramid_sigma)[150:1050]  # 16:9, 1600x900
+    standard = wide[:, 200:1400]  # 4:3 at the same height
+    frames = [wide, portrait(wide), standard, portrait(standard)]
+    results = compute_metrics(frames, ["blur", "edge_density"])
+    for metric in ("blur", "edge_density"):
+        scores = [r[metric]["score"] for r in results]
+        assert max(scores) - min(scores) < 0.05, (metric, scores)
+
+
+def test_strip_is_area_averaged_not_aliased():
+    strip = np.zeros((100, 4000, 3), dtype=np.uint8)
+    strip[:, ::2] = 255
+    result = compute_metrics([strip], ["blur"])[0]
+    assert result["lowResolution"]
+    assert result["blur"]["score"] < 0.1
+
+
+def test_batch_padding_does_not_change_scores():
+    frames = [blurred_scene((1600, 1200)), portrait(blurred_scene((1920, 1080))), blurred_scene((200, 150))]
+    batched = compute_metrics(frames)
+    for frame, result in zip(frames, batched):
+        (alone,) = compute_metrics([frame])
+        for metric in ("blur", "exposure", "edge_density", "color_variance", "tilt"):
+            assert alone[metric]["score"] == pytest.approx(result[metric]["score"], abs=1e-4), metric
+
+
+def test_low_resolution_frames_are_flagged_and_never_score_sharper():
+    full, thumb = compute_metrics([blurred_scene((1600, 1200)), blurred_scene((100, 75))], ["blur"])
+    assert not full["lowResolution"]
+    assert thumb["lowResolution"]
+    assert thumb["blur"]["score"] <= full["blur"]["score"]
+
+
+def test_blurred_input_scores_lower_than_sharp():
+    sharp, soft, heavy = compute_metrics(
+        [blurred_scene((1600, 1200), 0), blurred_scene((1600, 1200), 2), cv2.GaussianBlur(reference_scene(), (0, 0), 25)],
+        ["blur", "edge_density"],
+    )
+    assert sharp["blur"]["score"] > soft["blur"]["score"] > heavy["blur"]["score"]
+    assert sharp["edge_density"]["score"] > 0.9
+    assert heavy["edge_density"]["score"] < 0.05
+
+
+def test_smooth_gradient_has_no_edges():
+    ramp = np.tile(np.linspace(0, 255, 1600, dtype=np.float32), (1200, 1))
+    img = cv2.merge([ramp, ramp, ramp]).astype(np.uint8)
+    assert compute_metrics([img], ["edge_density"])[0]["edge_density"]["density"] == 0
+
+
+@pytest.mark.parametrize("angle", [-8, -5, 0, 5, 8])
+def test_tilt_matches_rotated_line_pattern(angle):
+    result = compute_metrics([line_pattern(angle)], ["tilt"])[0]["tilt"]
+    assert result["tiltDegrees"] == pytest.approx(angle, abs=0.3)
+
+
+def test_tilt_is_measured_in_source_frame_for_portrait():
+    result = compute_metrics([line_pattern(5, size=(1200, 1600))], ["tilt"])[0]["tilt"]
+    assert result["tiltDegrees"] == pytest.approx(5, abs=0.5)
+
+
+def test_portrait_input_gives_orientation_zero():
+    landscape, portrait = compute_metrics(
+        [np.zeros((480, 640, 3), dtype=np.uint8), np.zeros((640, 480, 3), dtype=np.uint8)], ["orientation"]
+    )
+    assert landscape["orientation"]["score"] == 1.0
+    assert portrait["orientation"]["score"] == 0.0
+    assert portrait["orientation"]["aspectRatio"] == pytest.approx(0.75)
+
+
+def test_mixed_size_batch_returns_one_result_per_image():
+    images = [np.zeros((h, w, 3), dtype=np.uint8) for w, h in [(4032, 3024), (640, 480), (1080, 1920), (100, 75)]]
+    results = compute_metrics(images)
+    assert len(results) == len(images)
+    assert all(len(r["exposure"]["histogram"]) == 16 for r in results)
+    assert compute_metrics([]) == []
+
+
+def test_unknown_metric_raises():
+    with pytest.raises(ValueError, match="sharpness"):
+        compute_metrics([np.zeros((240, 320, 3), dtype=np.uint8)], ["blur", "sharpness"])
+
+
+def test_calibration_constants_match_fit():
+    for key, value in fit_calibration().items():
+        assert CALIBRATION[key] == pytest.approx(value, rel=0.01)
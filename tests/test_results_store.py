@@ -0,0 +1,138 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from utils.results_store import ResultsStore
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_result(image_id, timestamp, filename="car.jpg", content_hash="abc"):
+    return {
+        "rules": [],
+        "overallScore": 50.0,
+        "suggestions": [],
+        "metadata": {
+            "imageId": image_id,
+            "filename": filename,
+            "contentHash": content_hash,
+            "timestamp": timestamp.isoformat(),
+        },
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / "results.db"))
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # main creates its data directories relative to the working directory on import
+    monkeypatch.chdir(tmp_path)
+    import main
+
+    monkeypatch.setattr(main, "results_store", ResultsStore(str(tmp_path / "results.db")))
+    return main
+
+
+@pytest.fixture
+def client(app_module):
+    return TestClient(app_module.app)
+
+
+def jpeg_bytes():
+    img = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+def test_save_and_get_round_trip(store):
+    result = make_result("img-1", T0)
+    store.save(result, endpoint="analyze")
+    assert store.get("img-1") == result
+    assert store.get("missing") is None
+
+
+def test_query_filters_and_paginates_newest_first(store):
+    for i in range(5):
+        store.save(make_result(f"img-{i}", T0 + timedelta(minutes=i), filename="a.jpg" if i % 2 else "b.jpg"), "analyze")
+
+    page, total = store.query(limit=2, offset=1)
+    assert total == 5
+    assert [r["metadata"]["imageId"] for r in page] == ["img-3", "img-2"]
+
+    page, total = store.query(filename="a.jpg")
+    assert total == 2
+    assert [r["metadata"]["imageId"] for r in page] == ["img-3", "img-1"]
+
+    page, total = store.query(since=T0 + timedelta(minutes=1), until=T0 + timedelta(minutes=3))
+    assert [r["metadata"]["imageId"] for r in page] == ["img-2", "img-1"]
+
+
+def test_query_compares_timestamps_in_utc(store):
+    store.save(make_result("img-1", T0), "analyze")
+    plus_two = timezone(timedelta(hours=2))
+    # 13:30+02:00 is 11:30 UTC, before the result
+    _, total = store.query(since=datetime(2026, 1, 1, 13, 30, tzinfo=plus_two))
+    assert total == 1
+    # Naive values are taken as UTC
+    _, total = store.query(since=datetime(2026, 1, 1, 12, 30))
+    assert total == 0
+
+
+def test_get_result_endpoint(client):
+    created = client.post("/analyze", files={"image": ("car.jpg", jpeg_bytes(), "image/jpeg")}).json()
+    image_id = created["metadata"]["imageId"]
+    assert client.get(f"/results/{image_id}").json() == created
+    assert client.get("/results/unknown-id").status_code == 404
+
+
+def test_query_results_endpoint(client, app_module):
+    for i in range(3):
+        app_module.results_store.save(make_result(f"img-{i}", T0 + timedelta(minutes=i)), "analyze")
+
+    body = client.get("/results", params={"limit": 2, "since": "2026-01-01T12:00:30Z"}).json()
+    assert body["total"] == 2
+    assert [r["metadata"]["imageId"] for r in body["results"]] == ["img-2", "img-1"]
+    assert client.get("/results", params={"since": "garbage"}).status_code == 422
+    assert client.get("/results", params={"limit": 0}).status_code == 422
+
+
+def failing_save(*args, **kwargs):
+    raise sqlite3.OperationalError("unable to open database file")
+
+
+def test_analyze_returns_result_when_store_fails(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.results_store, "save", failing_save)
+    response = client.post("/analyze", files={"image": ("car.jpg", jpeg_bytes(), "image/jpeg")})
+    assert response.status_code == 200
+    assert len(response.json()["rules"]) == 3
+
+
+def test_analyze_batch_keeps_result_when_store_fails(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.results_store, "save", failing_save)
+    monkeypatch.setattr(
+        app_module,
+        "analyze_with_openai_multi",
+        lambda contents, prompts: '[{"ruleId": "vehicle_staging", "status": "pass", "confidence": 90, "reason": "ok"}]',
+    )
+    response = client.post("/analyze_batch", files=[("images", ("car.jpg", jpeg_bytes(), "image/jpeg"))])
+    (result,) = response.json()["results"]
+    assert "error" not in result
+    assert result["rules"][0]["status"] == "pass"
+
+
+def test_unwritable_store_does_not_break_the_api(client, app_module, monkeypatch, tmp_path):
+    # Constructing the store must not touch the database
+    store = ResultsStore(str(tmp_path / "missing-dir" / "results.db"))
+    monkeypatch.setattr(app_module, "results_store", store)
+
+    response = client.post("/analyze", files={"image": ("car.jpg", jpeg_bytes(), "image/jpeg")})
+    assert response.status_code == 200
+    image_id = response.json()["metadata"]["imageId"]
+    assert client.get(f"/results/{image_id}").status_code == 503
+    assert client.get("/results").status_code == 503
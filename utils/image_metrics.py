@@ -0,0 +1,249 @@
+import math
+
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Every frame is scaled uniformly so its short side lands on this pyramid level
+# before scoring, so the scores depend neither on the resolution the photo was
+# taken at nor on its aspect ratio or orientation.
+PYRAMID_SHORT_SIDE = 240
+# The long side is capped at this multiple of the short side, so extreme strips
+# are shrunk further instead of blowing up the batch
+PYRAMID_MAX_ASPECT = 4.0
+
+DEFAULT_METRICS = ("blur", "exposure", "edge_density", "color_variance", "tilt", "orientation")
+
+# Calibration constants, expressed at the pyramid level on a 0-1 intensity scale.
+# blur_scale, edge_density_target and color_std_target are fitted by
+# calibrate_metrics.py against a synthetic reference scene; re-run it after
+# changing any metric.
+CALIBRATION = {
+    "blur_scale": 0.000679,         # 1px Gaussian blur on the reference scene scores 0.7
+    "exposure_clip_low": 0.02,      # Luminance below this counts as crushed shadows
+    "exposure_clip_high": 0.98,     # Luminance above this counts as blown highlights
+    "exposure_bins": 16,
+    "edge_threshold": 0.10,         # Gradient per pixel; Canny's high threshold of 200 in these units
+    "edge_density_target": 0.0129,  # Edge density of the sharp reference scene
+    "color_std_target": 0.325,      # Legacy colour-variance threshold lands on 0.6
+    "tilt_search_deg": 30.0,        # Only edges within this angle of horizontal vote
+    "tilt_tolerance_deg": 10.0,     # Tilt at which the score reaches 0
+}
+
+_GRAY_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)  # BGR
+
+
+def pyramid_scale(width: int, height: int, short_side: int = PYRAMID_SHORT_SIDE) -> float:
+    """Uniform factor that takes a width x height frame to the pyramid level."""
+    return min(short_side / min(width, height), short_side * PYRAMID_MAX_ASPECT / max(width, height))
+
+
+def is_low_resolution(image: np.ndarray, short_side: int = PYRAMID_SHORT_SIDE) -> bool:
+    """True if the frame's short side has less detail than the pyramid level."""
+    return min(image.shape[0], image.shape[1]) < short_side
+
+
+def to_pyramid_level(image: np.ndarray, short_side: int = PYRAMID_SHORT_SIDE) -> np.ndarray:
+    """
+    Reduce a BGR image to the pyramid level used for scoring, scaling both axes
+    by the same factor. Halves with pyrDown while the frame is at least twice
+    the target, then resamples with area averaging. Frames smaller than the
+    target are upscaled with bicubic interpolation, which adds no detail, so
+    they never score sharper than they really are.
+    """
+    while pyramid_scale(image.shape[1], image.shape[0], short_side) <= 0.5:
+        image = cv2.pyrDown(image)
+    scale = pyramid_scale(image.shape[1], image.shape[0], short_side)
+    size = (max(3, round(image.shape[1] * scale)), max(3, round(image.shape[0] * scale)))
+    if size == (image.shape[1], image.shape[0]):
+        return image
+    interpolation = cv2.INTER_CUBIC if scale > 1.0 else cv2.INTER_AREA
+    return cv2.resize(image, size, interpolation=interpolation)
+
+
+def compute_metrics(
+    images: Sequence[np.ndarray],
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    short_side: int = PYRAMID_SHORT_SIDE,
+    calibration: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, dict]]:
+    """
+    Compute the requested metrics for a batch of BGR images.
+    Returns one dict per image mapping metric name to {"score": 0-1, ...raw values},
+    plus "lowResolution" when the frame's short side was below the pyramid level.
+    """
+    unknown = set(metrics) - set(_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+    if len(images) == 0:
+        return []
+
+    cal = dict(CALIBRATION, **(calibration or {}))
+    source_dims = np.array([(img.shape[1], img.shape[0]) for img in images], dtype=np.float32)
+
+    # Frames keep their own aspect ratio, so they are zero-padded into one batch
+    # and every metric only looks at the masked, real pixels
+    levels = [to_pyramid_level(img, short_side) for img in images]
+    height = max(level.shape[0] for level in levels)
+    width = max(level.shape[1] for level in levels)
+    batch = np.zeros((len(levels), height, width, 3), dtype=np.float32)
+    mask = np.zeros((len(levels), height, width), dtype=bool)
+    for i, level in enumerate(levels):
+        batch[i, :level.shape[0], :level.shape[1]] = level / 255.0
+        mask[i, :level.shape[0], :level.shape[1]] = True
+    gray = batch @ _GRAY_WEIGHTS
+
+    # Content starts at the top-left corner, so a 3x3 window is fully inside
+    # the frame whenever its bottom-right pixel is
+    ctx = {"batch": batch, "gray": gray, "mask": mask, "interior": mask[:, 2:, 2:], "source_dims": source_dims, "cal": cal}
+    computed = {name: _METRICS[name](ctx) for name in metrics}
+
+    return [
+        dict(
+            {name: {key: _to_python(values[i]) for key, values in fields.items()} for name, fields in computed.items()},
+            lowResolution=is_low_resolution(images[i], short_side),
+        )
+        for i in range(len(images))
+    ]
+
+
+def _to_python(value):
+    if isinstance(value, np.ndarray):
+        return [round(float(v), 6) for v in value]
+    return round(float(value), 6)
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Per-image mean of values over the pixels where mask is set."""
+    n = len(values)
+    return (values * mask).reshape(n, -1).sum(axis=1) / mask.reshape(n, -1).sum(axis=1)
+
+
+def _gradients(ctx: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batched 3x3 Scharr gradients over the interior of the gray frames, scaled
+    to intensity change per pixel and zeroed outside the frame. Scharr is used
+    over Sobel for its much smaller angular error, which matters for the tilt
+    estimate.
+    """
+    if "gradients" not in ctx:
+        g = ctx["gray"]
+        gx = (3 * g[:, :-2, 2:] + 10 * g[:, 1:-1, 2:] + 3 * g[:, 2:, 2:]) - (3 * g[:, :-2, :-2] + 10 * g[:, 1:-1, :-2] + 3 * g[:, 2:, :-2])
+        gy = (3 * g[:, 2:, :-2] + 10 * g[:, 2:, 1:-1] + 3 * g[:, 2:, 2:]) - (3 * g[:, :-2, :-2] + 10 * g[:, :-2, 1:-1] + 3 * g[:, :-2, 2:])
+        interior = ctx["interior"]
+        ctx["gradients"] = (np.where(interior, gx / 32.0, 0.0), np.where(interior, gy / 32.0, 0.0))
+    return ctx["gradients"]
+
+
+def _edges(ctx: dict) -> np.ndarray:
+    """
+    Batched Canny-style edge map: gradient magnitude above the threshold that
+    is also a local maximum across the edge (non-maximum suppression), so
+    smooth colour ramps do not count as edges.
+    """
+    if "edges" not in ctx:
+        gx, gy = _gradients(ctx)
+        magnitude = np.hypot(gx, gy)
+        padded = np.pad(magnitude, ((0, 0), (1, 1), (1, 1)))
+        # Gradient direction quantized to 0/45/90/135 degrees (image y-axis points down)
+        sector = np.round(np.rad2deg(np.arctan2(gy, gx)) / 45.0).astype(np.int64) % 4
+        neighbours = [
+            (padded[:, 1:-1, :-2], padded[:, 1:-1, 2:]),
+            (padded[:, :-2, :-2], padded[:, 2:, 2:]),
+            (padded[:, :-2, 1:-1], padded[:, 2:, 1:-1]),
+            (padded[:, :-2, 2:], padded[:, 2:, :-2]),
+        ]
+        is_max = np.zeros(magnitude.shape, dtype=bool)
+        for direction, (before, after) in enumerate(neighbours):
+            is_max |= (sector == direction) & (magnitude >= before) & (magnitude > after)
+        ctx["edges"] = is_max & (magnitude > ctx["cal"]["edge_threshold"])
+    return ctx["edges"]
+
+
+def _blur(ctx: dict) -> dict:
+    g = ctx["gray"]
+    interior = ctx["interior"]
+    lap = g[:, :-2, 1:-1] + g[:, 2:, 1:-1] + g[:, 1:-1, :-2] + g[:, 1:-1, 2:] - 4 * g[:, 1:-1, 1:-1]
+    mean = _masked_mean(lap, interior)
+    variance = _masked_mean(lap ** 2, interior) - mean ** 2
+    score = 1.0 - np.exp(-variance / ctx["cal"]["blur_scale"])
+    return {"score": score, "laplacianVariance": variance}
+
+
+def _exposure(ctx: dict) -> dict:
+    cal = ctx["cal"]
+    n = len(ctx["gray"])
+    g = ctx["gray"].reshape(n, -1)
+    mask = ctx["mask"].reshape(n, -1)
+    bins = int(cal["exposure_bins"])
+    idx = np.minimum((g * bins).astype(np.int64), bins - 1)
+    offsets = np.arange(n)[:, None] * bins
+    histogram = np.bincount((idx + offsets).ravel(), weights=mask.ravel(), minlength=n * bins).reshape(n, bins)
+    histogram = histogram / mask.sum(axis=1)[:, None]
+
+    mean = _masked_mean(g, mask)
+    clipped = _masked_mean((g < cal["exposure_clip_low"]) | (g > cal["exposure_clip_high"]), mask)
+    balance = np.clip(1.0 - np.abs(mean - 0.5) * 2.0, 0.0, 1.0)
+    score = np.sqrt(balance) * (1.0 - clipped)
+    return {"score": score, "meanLuminance": mean, "clippedFraction": clipped, "histogram": histogram}
+
+
+def _edge_density(ctx: dict) -> dict:
+    density = _masked_mean(_edges(ctx), ctx["interior"])
+    score = np.clip(density / ctx["cal"]["edge_density_target"], 0.0, 1.0)
+    return {"score": score, "density": density}
+
+
+def _color_variance(ctx: dict) -> dict:
+    batch = ctx["batch"]
+    mask = ctx["mask"][..., None]
+    count = mask.reshape(len(batch), -1).sum(axis=1)[:, None]
+    mean = (batch * mask).reshape(len(batch), -1, 3).sum(axis=1) / count
+    square = (batch ** 2 * mask).reshape(len(batch), -1, 3).sum(axis=1) / count
+    std = np.sqrt(np.maximum(square - mean ** 2, 0.0)).mean(axis=1)
+    score = np.clip(std / ctx["cal"]["color_std_target"], 0.0, 1.0)
+    return {"score": score, "meanChannelStd": std}
+
+
+def _tilt(ctx: dict) -> dict:
+    """
+    Dominant angle of near-horizontal edges, in degrees. Frames are scaled
+    uniformly, so this is also the angle in the source frame. The image y-axis
+    points down, so a positive tilt is a clockwise rotation as displayed:
+    lines fall from left to right.
+    """
+    cal = ctx["cal"]
+    gx, gy = _gradients(ctx)
+    magnitude = np.hypot(gx, gy)
+    strong = magnitude > cal["edge_threshold"]
+    # Edge direction is perpendicular to the gradient
+    angle = np.arctan2(gx, -gy)
+    angle = (angle + np.pi / 2) % np.pi - np.pi / 2
+    near_horizontal = np.abs(angle) < math.radians(cal["tilt_search_deg"])
+    weight = np.where(strong & near_horizontal, magnitude, 0.0).reshape(len(gx), -1)
+
+    # Doubled-angle average so that +/- small angles do not cancel out
+    two = 2.0 * angle.reshape(len(gx), -1)
+    total = weight.sum(axis=1)
+    sin_sum = (weight * np.sin(two)).sum(axis=1)
+    cos_sum = (weight * np.cos(two)).sum(axis=1)
+    tilt = np.where(total > 0, np.rad2deg(0.5 * np.arctan2(sin_sum, cos_sum)), 0.0)
+    score = np.clip(1.0 - np.abs(tilt) / cal["tilt_tolerance_deg"], 0.0, 1.0)
+    return {"score": score, "tiltDegrees": tilt}
+
+
+def _orientation(ctx: dict) -> dict:
+    dims = ctx["source_dims"]
+    aspect = dims[:, 0] / dims[:, 1]
+    score = (aspect >= 1.0).astype(np.float32)
+    return {"score": score, "aspectRatio": aspect}
+
+
+_METRICS = {
+    "blur": _blur,
+    "exposure": _exposure,
+    "edge_density": _edge_density,
+    "color_variance": _color_variance,
+    "tilt": _tilt,
+    "orientation": _orientation,
+}
@@ -0,0 +1,90 @@
+"""
+Reference data for the local image-metrics engine: the legacy analyze_image
+scoring, a synthetic reference scene, and the fit of the calibration constants.
+
+The reference scene is mid-grey plus equal-amplitude noise octaves from 2px to
+128px at REFERENCE_SIZE, a stand-in for the multi-scale detail of a real 4:3
+photo, with an intensity std of REFERENCE_CONTRAST. Each constant is fitted so
+that a defined reference frame lands exactly on the default rule threshold:
+
+- blur_scale: the scene blurred by REFERENCE_BLUR_PX at the pyramid level
+  scores the rule1 threshold, so anything softer fails.
+- edge_density_target: the sharp scene scores 1.0, so rule2 fails below 80%
+  of its edge density.
+- color_std_target: colour variance barely depends on resolution, so it keeps
+  its legacy meaning. The scene contrast is bisected until the legacy
+  full-resolution score sits on the rule3 threshold, and that frame defines it.
+"""
+import math
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from utils.image_metrics import compute_metrics, pyramid_scale
+
+REFERENCE_SIZE = (1600, 1200)  # (width, height)
+REFERENCE_CONTRAST = 50.0  # Intensity std on the 0-255 scale
+REFERENCE_BLUR_PX = 1.0  # Gaussian sigma in pixels at the pyramid level
+
+# Default thresholds of rule1 and rule3 in main.RULES
+BLUR_THRESHOLD = 0.7
+COLOR_THRESHOLD = 0.6
+
+
+def legacy_scores(image: np.ndarray) -> tuple:
+    """The scoring previously done by analyze_image on the full-resolution frame"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    quality_score = min(1.0, cv2.Laplacian(gray, cv2.CV_64F).var() / 500)
+    edges = cv2.Canny(gray, 100, 200)
+    visibility_score = min(1.0, np.count_nonzero(edges) / (image.shape[0] * image.shape[1]) * 10)
+    background_score = min(1.0, np.mean(np.std(image, axis=(0, 1))) / 100)
+    return quality_score, visibility_score, background_score
+
+
+@lru_cache(maxsize=1)
+def _texture() -> np.ndarray:
+    width, height = REFERENCE_SIZE
+    rng = np.random.default_rng(0)
+    texture = np.zeros((height, width, 3), dtype=np.float32)
+    for cell in (2, 4, 8, 16, 32, 64, 128):
+        noise = rng.uniform(-1, 1, (height // cell + 1, width // cell + 1, 3)).astype(np.float32)
+        texture += cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+    return texture / texture.std()
+
+
+def reference_scene(contrast: float = REFERENCE_CONTRAST) -> np.ndarray:
+    """Reference frame whose intensity std is roughly `contrast` on the 0-255 scale"""
+    return np.clip(128 + contrast * _texture(), 0, 255).astype(np.uint8)
+
+
+def blurred_reference_scene(pyramid_sigma: float = REFERENCE_BLUR_PX) -> np.ndarray:
+    """Reference scene with a Gaussian blur of pyramid_sigma pixels at the pyramid level"""
+    scene = reference_scene()
+    if pyramid_sigma <= 0:
+        return scene
+    return cv2.GaussianBlur(scene, (0, 0), pyramid_sigma / pyramid_scale(*REFERENCE_SIZE))
+
+
+def solve_legacy_color(target: float, low: float = 0.0, high: float = 128.0, steps: int = 16) -> float:
+    """Bisect the scene contrast until the legacy colour-variance score equals target"""
+    for _ in range(steps):
+        mid = (low + high) / 2
+        if legacy_scores(reference_scene(mid))[2] > target:
+            high = mid
+        else:
+            low = mid
+    return (low + high) / 2
+
+
+def fit_calibration() -> dict:
+    variance = compute_metrics([blurred_reference_scene()], ["blur"])[0]["blur"]["laplacianVariance"]
+    density = compute_metrics([reference_scene()], ["edge_density"])[0]["edge_density"]["density"]
+    color_frame = reference_scene(solve_legacy_color(COLOR_THRESHOLD))
+    std = compute_metrics([color_frame], ["color_variance"])[0]["color_variance"]["meanChannelStd"]
+
+    return {
+        "blur_scale": variance / -math.log(1 - BLUR_THRESHOLD),
+        "edge_density_target": density,
+        "color_std_target": std / COLOR_THRESHOLD,
+    }
@@ -0,0 +1,104 @@
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    image_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    filename TEXT,
+    endpoint TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_content_hash ON results (content_hash);
+CREATE INDEX IF NOT EXISTS idx_results_filename ON results (filename);
+CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at);
+"""
+
+
+def to_utc_iso(value: datetime) -> str:
+    """
+    Normalise a timestamp to a fixed-width UTC ISO string so that stored and
+    queried values compare correctly as text. Naive values are taken as UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+class ResultsStore:
+    """SQLite-backed store of analysis results, indexed by imageId, content hash, filename and timestamp"""
+
+    def __init__(self, path: str):
+        # The schema is created on first use, so an unwritable path only fails
+        # the storage calls and never the import of the app
+        self.path = path
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        if not self._schema_ready:
+            try:
+                conn.executescript(SCHEMA)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._schema_ready = True
+        return conn
+
+    def save(self, results: dict, endpoint: str) -> None:
+        metadata = results["metadata"]
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (image_id, content_hash, filename, endpoint, created_at, results) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    metadata["imageId"],
+                    metadata["contentHash"],
+                    metadata.get("filename"),
+                    endpoint,
+                    to_utc_iso(datetime.fromisoformat(metadata["timestamp"])),
+                    json.dumps(results),
+                ),
+            )
+
+    def get(self, image_id: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT results FROM results WHERE image_id = ?", (image_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(
+        self,
+        content_hash: Optional[str] = None,
+        filename: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Tuple[List[dict], int]:
+        """Return one page of results, newest first, and the total number of matches"""
+        clauses, params = [], []
+        if content_hash is not None:
+            clauses.append("content_hash = ?")
+            params.append(content_hash)
+        if filename is not None:
+            clauses.append("filename = ?")
+            params.append(filename)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(to_utc_iso(since))
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(to_utc_iso(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT results FROM results{where} ORDER BY created_at DESC, image_id LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows], total